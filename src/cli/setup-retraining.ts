@@ -176,10 +176,11 @@ On other systems, ensure Python 3.8+ is properly installed.
     console.log(`Location: ${venvPath}`);
     console.log('');
     console.log('Installed packages:');
-    console.log('  - numpy==1.24.3');
-    console.log('  - pandas==2.0.3');
-    console.log('  - scikit-learn==1.3.0');
-    console.log('  - joblib==1.3.2');
+    console.log('  - tensorflow');
+    console.log('  - tf-keras');
+    console.log('  - numpy');
+    console.log('  - tensorflowjs');
+    console.log('  - scikit-learn');
     console.log('');
     console.log('You can now use:');
     console.log('  await fraudGuard.retrain()');